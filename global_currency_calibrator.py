@@ -1,122 +1,314 @@
 import datetime as dt
+import json
+import pathlib
+import re
+import sqlite3
 import sys
-from typing import Dict, Tuple
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache, partial
+from typing import Dict, Iterable, List, Optional, Tuple
 
+import numpy as np
 import requests
-import matplotlib.pyplot as plt
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import DecodeError, ProtocolError
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+from urllib3.util.retry import Retry
+import matplotlib
+matplotlib.use("Agg")  # charts are embedded in the Tk window; no pyplot GUI windows
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.axes import Axes
+from matplotlib.figure import Figure
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib json parser
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # optional: fresh timeseries bodies are then decoded in full
+    ijson = None
+
 API_BASE = "https://api.frankfurter.app"
+_RATE_TTL_SECONDS = 3600
+
+# Shared session so back-to-back calls reuse the pooled keep-alive connection
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504]),
+    ),
+)
+_SESSION.headers.update({"Accept": "application/json", "User-Agent": "ccy-calibrator/1.0"})
+
+# On-disk cache of raw timeseries bodies, so relaunching the app the same day skips the download.
+# Opened lazily by _ts_db(); accessed from worker threads, hence check_same_thread=False plus a lock.
+_DB: Optional[sqlite3.Connection] = None
+_DB_FAILED = False
+_DB_LOCK = threading.Lock()
 
 
 # ---------- Core functions (Frankfurter-compatible) ----------
 
-def fetch_conversion(amount: float, base: str, target: str) -> Tuple[float, float]:
+def _submit(fn, *args) -> Future:
     """
-    Returns (converted_amount, rate) using t7he latest available rate via Frankfurter.
-    Frankfurter latest endpoint:
-      GET /latest?amount=...&from=...&to=...
-    Response example:
-      { "amount": 10.0, "base": "USD", "date": "2025-11-10", "rates": {"INR": 835.12} }
+    Runs `fn(*args)` on its own daemon thread and returns a Future for the result.
+    Unlike ThreadPoolExecutor workers, these threads are not joined at interpreter
+    exit, so a request still on the wire can't keep the process alive after the
+    window is closed.
     """
-    if base == target:
-        return amount, 1.0
+    fut = Future()
+
+    def run():
+        if not fut.set_running_or_notify_cancel():
+            return
+        try:
+            fut.set_result(fn(*args))
+        except BaseException as e:
+            fut.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return fut
+
+
+def _loads(raw: bytes):
+    """Decodes a JSON body with orjson when available, else with the stdlib parser."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _rate_bucket() -> int:
+    """Hour-sized bucket used as the TTL component of the rate cache keys."""
+    return int(time.time() // _RATE_TTL_SECONDS)
+
 
+@lru_cache(maxsize=64)
+def _unit_rate(base: str, target: str, epoch_bucket: int) -> float:
+    """
+    Returns the latest rate for 1 `base` in `target`. Cached per `epoch_bucket`,
+    so changing only the amount never goes back to the network.
+    """
     url = f"{API_BASE}/latest"
-    params = {"amount": amount, "from": base, "to": target}
-    r = requests.get(url, params=params, timeout=15)
+    params = {"amount": 1, "from": base, "to": target}
+    r = _SESSION.get(url, params=params, timeout=15)
     r.raise_for_status()
-    data = r.json()
+    data = _loads(r.content)
 
     rates = data.get("rates", {})
     if target not in rates:
         raise ValueError(f"No rate returned for {base}->{target}. Response: {data}")
+    # Frankfurter echoes the base amount it converted; normalise against it
+    return float(rates[target]) / float(data.get("amount", 1))
 
-    converted = float(rates[target])
-    # The unit rate is for 1 base, so ask again with amount=1 (or divide converted/amount)
-    rate = converted / amount if amount != 0 else float("nan")
-    return converted, rate
 
+def fetch_conversion(amount: float, base: str, target: str) -> Tuple[float, float]:
+    """
+    Returns (converted_amount, rate) using the latest available rate via Frankfurter.
+    Frankfurter latest endpoint:
+      GET /latest?amount=...&from=...&to=...
+    Response example:
+      { "amount": 10.0, "base": "USD", "date": "2025-11-10", "rates": {"INR": 835.12} }
+    The unit rate is cached for an hour and scaled by `amount` locally.
+    """
+    if base == target:
+        return amount, 1.0
 
-def fetch_timeseries(base: str, target: str, days: int = 30) -> Dict[str, float]:
+    rate = _unit_rate(base, target, _rate_bucket())
+    return amount * rate, rate
+
+
+def _ts_db() -> Optional[sqlite3.Connection]:
     """
-    Returns dict { 'YYYY-MM-DD': rate } for the past `days` calendar days via Frankfurter.
-    Frankfurter timeseries style: /YYYY-MM-DD..YYYY-MM-DD?from=USD&to=INR
+    Returns the cache connection, opening it on first use. Returns None if the cache
+    can't be opened (unwritable home, corrupt file, ...); callers then go to the network.
+    Must be called with _DB_LOCK held.
     """
-    end = dt.date.today()
-    start = end - dt.timedelta(days=days)
-    url = f"{API_BASE}/{start.isoformat()}..{end.isoformat()}"
-    params = {"from": base, "to": target}
-    r = requests.get(url, params=params, timeout=20)
-    r.raise_for_status()
-    data = r.json()
+    global _DB, _DB_FAILED
+    if _DB is None and not _DB_FAILED:
+        try:
+            db = sqlite3.connect(pathlib.Path.home() / ".ccy_cache.db", isolation_level=None,
+                                 check_same_thread=False)
+            db.execute("CREATE TABLE IF NOT EXISTS ts (k TEXT PRIMARY KEY, fetched DATE, blob BLOB)")
+        except (sqlite3.Error, RuntimeError):
+            _DB_FAILED = True
+        else:
+            _DB = db
+    return _DB
+
+
+def _ts_cache_get(key: str, fetched: dt.date) -> Optional[bytes]:
+    """Returns the raw timeseries body stored on disk for `key` today, if any."""
+    with _DB_LOCK:
+        db = _ts_db()
+        if db is None:
+            return None
+        try:
+            row = db.execute("SELECT blob FROM ts WHERE k=? AND fetched=?", (key, fetched.isoformat())).fetchone()
+        except sqlite3.Error:
+            return None
+    return row[0] if row else None
+
+
+def _ts_cache_put(key: str, fetched: dt.date, blob: bytes) -> None:
+    """Stores a body for today and drops entries from earlier days, which can never hit again."""
+    with _DB_LOCK:
+        db = _ts_db()
+        if db is None:
+            return
+        try:
+            db.execute("DELETE FROM ts WHERE fetched < ?", (fetched.isoformat(),))
+            db.execute("INSERT OR REPLACE INTO ts (k, fetched, blob) VALUES (?, ?, ?)",
+                       (key, fetched.isoformat(), blob))
+        except sqlite3.Error:
+            pass
+
 
+def _day_rates(data) -> Iterable[Tuple[str, Dict[str, float]]]:
+    """Returns the (day, {ccy: rate}) pairs of a decoded timeseries body."""
     # data example:
     # { "amount": 1.0, "start_date": "...", "end_date": "...",
     #   "base": "USD", "rates": {"2025-10-20": {"INR": 83.2}, ... } }
     if "rates" not in data:
         raise ValueError(f"Timeseries failed: {data}")
+    return data["rates"].items()
 
-    rates = {}
-    for day in sorted(data["rates"].keys()):
-        payload = data["rates"][day]
-        val = payload.get(target)
-        if val is not None:
-            rates[day] = float(val)
-    if not rates:
+
+def _target_items(day_rates: Iterable[Tuple[str, Dict[str, float]]], target: str) -> List[Tuple[str, float]]:
+    """Single pass over the per-day payloads, keeping only the `target` rate."""
+    return [(day, float(val)) for day, payload in day_rates
+            if (val := payload.get(target)) is not None]
+
+
+class _TeeReader:
+    """
+    File-like view of a streamed response that keeps the bytes read, so the body can still be cached.
+    Reading r.raw bypasses requests, so urllib3 errors are mapped the way Response.iter_content does.
+    """
+
+    def __init__(self, raw):
+        self._raw = raw
+        self.chunks = []
+
+    def read(self, size=None) -> bytes:
+        try:
+            chunk = self._raw.read(size, decode_content=True)
+        except ProtocolError as e:
+            raise requests.exceptions.ChunkedEncodingError(e)
+        except DecodeError as e:
+            raise requests.exceptions.ContentDecodingError(e)
+        except Urllib3HTTPError as e:  # read timeouts and anything else raised mid-body
+            raise requests.exceptions.ConnectionError(e)
+        self.chunks.append(chunk)
+        return chunk
+
+
+@lru_cache(maxsize=64)
+def _cached_timeseries(base: str, target: str, days: int, today_ordinal: int) -> Tuple[Tuple[str, float], ...]:
+    """Fetches the timeseries once per calendar day; returned as a hashable tuple of items."""
+    end = dt.date.fromordinal(today_ordinal)
+    start = end - dt.timedelta(days=days)
+    key = f"{base}:{target}:{start.isoformat()}:{end.isoformat()}"
+    blob = _ts_cache_get(key, end)
+    fresh = blob is None
+    if not fresh:
+        items = _target_items(_day_rates(_loads(blob)), target)
+    else:
+        url = f"{API_BASE}/{start.isoformat()}..{end.isoformat()}"
+        params = {"from": base, "to": target}
+        if ijson is not None:
+            # Parse "rates" incrementally as it arrives instead of building the full nested dict
+            with _SESSION.get(url, params=params, timeout=20, stream=True) as r:
+                r.raise_for_status()
+                tee = _TeeReader(r.raw)
+                items = _target_items(ijson.kvitems(tee, "rates", use_float=True), target)
+                tee.read()  # drain anything after "rates" so the cached body is complete
+            blob = b"".join(tee.chunks)
+            if not items:
+                _day_rates(_loads(blob))  # surfaces a missing "rates" key with the body
+        else:
+            r = _SESSION.get(url, params=params, timeout=20)
+            r.raise_for_status()
+            blob = r.content
+            items = _target_items(_day_rates(_loads(blob)), target)
+
+    if not items:
         raise ValueError("No historical rates returned.")
-    return rates
+    items.sort()  # ISO dates sort chronologically
+    if fresh:
+        _ts_cache_put(key, end, blob)
+    return tuple(items)
+
+
+def fetch_timeseries(base: str, target: str, days: int = 30) -> Dict[str, float]:
+    """
+    Returns dict { 'YYYY-MM-DD': rate } for the past `days` calendar days via Frankfurter.
+    Frankfurter timeseries style: /YYYY-MM-DD..YYYY-MM-DD?from=USD&to=INR
+    Results are cached per (base, target, days) for the current day.
+    """
+    return dict(_cached_timeseries(base, target, days, dt.date.today().toordinal()))
 
 
 # ---------- Plotting helpers ----------
 
-def plot_rate_history(rates: Dict[str, float], base: str, target: str) -> None:
-    dates = [dt.datetime.fromisoformat(d) for d in rates.keys()]
-    values = list(rates.values())
+def plot_rate_history(ax: Axes, rates: Dict[str, float], base: str, target: str,
+                      values: Optional[np.ndarray] = None) -> None:
+    dates = np.asarray(list(rates.keys()), dtype="datetime64[D]")
+    if values is None:
+        values = np.fromiter(rates.values(), dtype=np.float64, count=len(rates))
 
-    plt.figure()
-    plt.plot(dates, values)
-    plt.title(f"Exchange Rate: 1 {base} in {target} (Last {len(values)} Days)")
-    plt.xlabel("Date")
-    plt.ylabel(f"Rate ({target} per {base})")
-    plt.grid(True)
-    plt.tight_layout()
+    ax.clear()
+    ax.plot(dates, values)
+    ax.set_title(f"Exchange Rate: 1 {base} in {target} (Last {len(values)} Days)")
+    ax.set_xlabel("Date")
+    ax.set_ylabel(f"Rate ({target} per {base})")
+    ax.grid(True)
+    ax.figure.autofmt_xdate()
 
 
-def plot_today_vs_avg(today_rate: float, avg_rate: float, base: str, target: str) -> None:
+def plot_today_vs_avg(ax: Axes, today_rate: float, avg_rate: float, base: str, target: str) -> None:
     labels = ["Today", "Period Avg"]
     values = [today_rate, avg_rate]
 
-    plt.figure()
-    plt.bar(labels, values)
-    plt.title(f"Rate Difference: {base} → {target}")
-    plt.ylabel(f"{target} per {base}")
-    for i, v in enumerate(values):
-        plt.text(i, v, f"{v:.4f}", ha="center", va="bottom")
-    plt.tight_layout()
+    ax.clear()
+    bars = ax.bar(labels, values)
+    ax.set_title(f"Rate Difference: {base} → {target}")
+    ax.set_ylabel(f"{target} per {base}")
+    ax.bar_label(bars, fmt="%.4f", padding=2)
 
 
-def plot_amount_comparison(original_amount: float, converted_amount: float, base: str, target: str) -> None:
+def plot_amount_comparison(ax: Axes, original_amount: float, converted_amount: float,
+                           base: str, target: str) -> None:
     labels = [f"Original ({base})", f"Converted ({target})"]
     values = [original_amount, converted_amount]
 
-    plt.figure()
-    plt.bar(labels, values)
-    plt.title(f"Amount Comparison: {base} → {target}")
-    plt.ylabel("Amount")
-    for i, v in enumerate(values):
-        plt.text(i, v, f"{v:.4f}", ha="center", va="bottom")
-    plt.tight_layout()
+    ax.clear()
+    bars = ax.bar(labels, values)
+    ax.set_title(f"Amount Comparison: {base} → {target}")
+    ax.set_ylabel("Amount")
+    ax.bar_label(bars, fmt="%.4f", padding=2)
 
 
 # ---------- Utilities ----------
 
+_CCY_RE = re.compile(r"[A-Za-z]{3}")
+_UP = str.maketrans("abcdefghijklmnopqrstuvwxyz", "ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+
+
 def normalize_ccy(ccy: str) -> str:
-    c = ccy.strip().upper()
-    if len(c) != 3 or not c.isalpha():
+    c = ccy.strip()
+    if not _CCY_RE.fullmatch(c):
         raise ValueError(f"Invalid currency code: {ccy!r}. Use ISO 4217 codes like USD, EUR, INR.")
-    return c
+    # The regex guarantees ASCII letters, so a fixed table is enough to upper-case
+    return c.translate(_UP)
 
 
 # ---------- Tkinter GUI ----------
@@ -125,12 +317,15 @@ class CurrencyApp(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("Currency Converter (Frankfurter)")
-        self.geometry("520x360")
-        self.resizable(False, False)
+        self.geometry("1100x700")
+        self.minsize(640, 480)
+        # Countdown of outstanding fetch futures, see _on_fetch_done
+        self._fetch_lock = threading.Lock()
+        self._fetch_pending = 0
 
         # Inputs
         frm = ttk.Frame(self, padding=12)
-        frm.pack(fill="both", expand=True)
+        frm.pack(side="top", fill="x")
 
         self.amount_var = tk.StringVar(value="100")
         self.base_var = tk.StringVar(value="INR")
@@ -151,21 +346,33 @@ class CurrencyApp(tk.Tk):
 
         btns = ttk.Frame(frm)
         btns.grid(row=4, column=0, columnspan=2, pady=10)
-        ttk.Button(btns, text="Convert & Plot", command=self.on_convert).grid(row=0, column=0, padx=6)
+        self.convert_btn = ttk.Button(btns, text="Convert & Plot", command=self._start_convert)
+        self.convert_btn.grid(row=0, column=0, padx=6)
         ttk.Button(btns, text="Clear Output", command=self.clear_output).grid(row=0, column=1, padx=6)
 
         # Output box
         ttk.Label(frm, text="Output").grid(row=5, column=0, sticky="nw", padx=6, pady=6)
         self.output = tk.Text(frm, height=10, width=60, wrap="word")
         self.output.grid(row=5, column=1, sticky="w", padx=6, pady=6)
+        # Lines queued by _write_line, inserted in one go by _flush
+        self._buf = []
 
         for i in range(2):
             frm.columnconfigure(i, weight=1)
 
+        # Chart area: figures are rendered with Agg and embedded here
+        self.charts = ttk.Frame(self, padding=(12, 0, 12, 12))
+        self.charts.pack(side="top", fill="both", expand=True)
+        self.charts.rowconfigure(0, weight=1)
+        # One long-lived figure per chart; each refresh clears and redraws its axes
+        self._canvases = []
+        self._ax_hist, self._ax_diff, self._ax_amount = (self._add_chart(col) for col in range(3))
+
     def clear_output(self):
         self.output.delete("1.0", tk.END)
 
-    def on_convert(self):
+    def _start_convert(self):
+        """Validates the inputs on the Tk thread and hands the network work to daemon fetch threads."""
         try:
             amount = float(self.amount_var.get())
             base = normalize_ccy(self.base_var.get())
@@ -174,9 +381,71 @@ class CurrencyApp(tk.Tk):
             days = int(days_str) if days_str else 30
             if days < 1:
                 raise ValueError("History days must be >= 1")
-
-            converted, today_rate = fetch_conversion(amount, base, target)
-
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+            return
+
+        if base == target:
+            # Identity pair: synthesise a flat series locally instead of querying Frankfurter
+            today = dt.date.today()
+            rates = {(today - dt.timedelta(days=i)).isoformat(): 1.0 for i in range(days, -1, -1)}
+            self._render_results(amount, base, target, days, amount, 1.0, rates)
+            return
+
+        self.convert_btn.state(["disabled"])
+        # The latest-rate and timeseries requests are independent, so run them side by side;
+        # _on_fetch_done counts them down and the later of the two hands the outcome back to
+        # the Tk thread. The disabled button keeps this to one fetch in flight, so the
+        # countdown can live on self.
+        f_conv = _submit(fetch_conversion, amount, base, target)
+        f_hist = _submit(fetch_timeseries, base, target, days)
+        with self._fetch_lock:
+            self._fetch_pending = 2
+        on_done = partial(self._on_fetch_done, amount, base, target, days, f_conv, f_hist)
+        f_conv.add_done_callback(on_done)
+        f_hist.add_done_callback(on_done)
+
+    def _on_fetch_done(self, amount: float, base: str, target: str, days: int,
+                       f_conv: Future, f_hist: Future, _done: Future):
+        """
+        Done-callback for each fetch future. Runs on the fetch thread that completed it
+        (or on the Tk thread if the future had already finished when it was attached).
+        The only Tk call made from here is after(), via _post().
+        """
+        with self._fetch_lock:
+            self._fetch_pending -= 1
+            if self._fetch_pending:
+                return
+        self._post(self._finish_fetch, amount, base, target, days, f_conv, f_hist)
+
+    def _post(self, func, *args):
+        """Schedules `func` on the Tk thread; a no-op once the window has been destroyed."""
+        try:
+            self.after(0, func, *args)
+        except (RuntimeError, tk.TclError):
+            pass
+
+    def _finish_fetch(self, amount: float, base: str, target: str, days: int,
+                      f_conv: Future, f_hist: Future):
+        for fut in (f_conv, f_hist):
+            exc = fut.exception()
+            if exc is not None:
+                self._on_fetch_error(exc)
+                return
+        converted, today_rate = f_conv.result()
+        self._render_results(amount, base, target, days, converted, today_rate, f_hist.result())
+
+    def _on_fetch_error(self, exc: Exception):
+        self.convert_btn.state(["!disabled"])
+        if isinstance(exc, requests.exceptions.RequestException):
+            messagebox.showerror("Network Error", f"Error while fetching rates.\n\nDetails:\n{exc}")
+        else:
+            messagebox.showerror("Error", str(exc))
+
+    def _render_results(self, amount: float, base: str, target: str, days: int,
+                        converted: float, today_rate: float, rates: Dict[str, float]):
+        self.convert_btn.state(["!disabled"])
+        try:
             self.clear_output()
             self._write_line("-" * 50)
             self._write_line(f"Amount       : {amount:.4f} {base}")
@@ -184,9 +453,6 @@ class CurrencyApp(tk.Tk):
             self._write_line(f"Converted    : {converted:.4f} {target}")
             self._write_line("-" * 50)
 
-            # Historical charts
-            rates = fetch_timeseries(base, target, days=days)
-
             # Average excluding (potential) last day if it's today
             dates_sorted = list(rates.keys())
             if dates_sorted:
@@ -195,28 +461,41 @@ class CurrencyApp(tk.Tk):
             else:
                 is_today_included = False
 
-            values = list(rates.values())
-            if is_today_included and len(values) > 1:
-                avg_rate = sum(values[:-1]) / (len(values) - 1)
-            else:
-                avg_rate = sum(values) / len(values)
+            arr = np.fromiter(rates.values(), dtype=np.float64, count=len(rates))
+            avg_rate = float(arr[:-1].mean() if is_today_included and arr.size > 1 else arr.mean())
 
             self._write_line(f"Avg rate ({days}d window): {avg_rate:.6f} {target}/{base}")
-            self._write_line("Close the charts to continue...")
+            self._flush()
 
-            # Make the plots in separate windows
-            plot_rate_history(rates, base, target)
-            plot_today_vs_avg(today_rate, avg_rate, base, target)
-            plot_amount_comparison(amount, converted, base, target)
-            plt.show()
+            plot_rate_history(self._ax_hist, rates, base, target, arr)
+            plot_today_vs_avg(self._ax_diff, today_rate, avg_rate, base, target)
+            plot_amount_comparison(self._ax_amount, amount, converted, base, target)
+            for canvas in self._canvases:
+                canvas.draw_idle()
 
-        except requests.exceptions.RequestException as e:
-            messagebox.showerror("Network Error", f"Error while fetching rates.\n\nDetails:\n{e}")
         except Exception as e:
+            # Show whatever was written before the failure behind the dialog
+            self._flush()
             messagebox.showerror("Error", str(e))
 
+    def _add_chart(self, col: int) -> Axes:
+        # tight_layout=True re-runs the layout on every draw, so resizes stay tidy
+        fig = Figure(tight_layout=True)
+        ax = fig.add_subplot()
+        canvas = FigureCanvasTkAgg(fig, master=self.charts)
+        canvas.get_tk_widget().grid(row=0, column=col, sticky="nsew", padx=4, pady=4)
+        self.charts.columnconfigure(col, weight=1, uniform="chart")
+        self._canvases.append(canvas)
+        return ax
+
     def _write_line(self, text: str):
-        self.output.insert(tk.END, text + "\n")
+        self._buf.append(text + "\n")
+
+    def _flush(self):
+        if not self._buf:
+            return
+        self.output.insert(tk.END, "".join(self._buf))
+        self._buf.clear()
         self.output.see(tk.END)
 
 